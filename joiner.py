@@ -1,7 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import random
+import secrets
+import sys
+import threading
+import time
 import requests
 import re
 from datetime import datetime
@@ -41,6 +52,27 @@ processed_messages = {}
 for channel_id in DISCORD_CHANNELS:
     processed_messages[channel_id] = set()
 
+# Webhooks de saída - lista separada por vírgula em WEBHOOK_URLS
+WEBHOOK_URLS = [url.strip() for url in os.getenv("WEBHOOK_URLS", "").split(",") if url.strip()]
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", 20))
+WEBHOOK_BATCH_INTERVAL = float(os.getenv("WEBHOOK_BATCH_INTERVAL", 1.0))
+WEBHOOK_MAX_CONCURRENCY = max(1, int(os.getenv("WEBHOOK_MAX_CONCURRENCY", 4)))
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", 3))
+WEBHOOK_RETRY_BASE_DELAY = float(os.getenv("WEBHOOK_RETRY_BASE_DELAY", 0.5))
+WEBHOOK_QUEUE_SIZE = max(1, int(os.getenv("WEBHOOK_QUEUE_SIZE", 1000)))
+WEBHOOK_DEAD_LETTER_SIZE = int(os.getenv("WEBHOOK_DEAD_LETTER_SIZE", 100))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", 10))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", 5))
+WEBHOOK_SEEN_SIZE = int(os.getenv("WEBHOOK_SEEN_SIZE", 100))
+
+# Profiling / admin - endpoints de admin ficam desativados sem ADMIN_TOKEN
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.1))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", 0.25))
+LOOP_LAG_EVENTS_SIZE = int(os.getenv("LOOP_LAG_EVENTS_SIZE", 50))
+
 def get_server_info():
     """Obtém informações do servidor web"""
     info = {
@@ -361,6 +393,488 @@ def parse_brainrot_embed(message_data: dict, channel_id: str) -> Optional[Brainr
     
     return None
 
+def notification_to_dict(notification: BrainrotNotification) -> dict:
+    """Converte uma notificação no formato JSON usado pela API e pelos webhooks"""
+    return {
+        "message_id": notification.message_id,
+        "brainrot_name": notification.brainrot_name,
+        "generation_rate": notification.generation_rate,
+        "job_id": notification.job_id,
+        "channel_id": notification.channel_id,
+        "timestamp": notification.timestamp,
+        "players": notification.players,
+        "base_name": notification.base_name
+    }
+
+class WebhookDispatcher:
+    """Envia notificações para webhooks externos com fila, lotes e retentativas.
+
+    Cada destino tem sua própria fila, worker e semáforo, então um webhook lento
+    não atrasa os outros. Cada destino pode ter até WEBHOOK_MAX_CONCURRENCY lotes
+    em envio e os lotes que esgotam as retentativas vão para um buffer de dead-letter.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.urls = list(urls)
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.executors: Dict[str, ThreadPoolExecutor] = {}
+        self.workers: Dict[str, asyncio.Task] = {}
+        self.in_flight = set()
+        self.dead_letters = deque(maxlen=WEBHOOK_DEAD_LETTER_SIZE)
+        self.stats = {
+            url: {"queued": 0, "delivered": 0, "failed": 0, "dropped": 0, "retries": 0, "last_error": None}
+            for url in self.urls
+        }
+
+    def start(self):
+        if self.workers:
+            return
+        for url in self.urls:
+            self.queues[url] = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+            self.semaphores[url] = asyncio.Semaphore(WEBHOOK_MAX_CONCURRENCY)
+            # Threads próprias por destino: um webhook lento não ocupa o executor padrão
+            self.executors[url] = ThreadPoolExecutor(max_workers=WEBHOOK_MAX_CONCURRENCY, thread_name_prefix="webhook")
+            self.workers[url] = asyncio.create_task(self._worker(url))
+        print(f"📤 Webhooks ativos: {len(self.urls)} destino(s)")
+
+    async def stop(self):
+        tasks = list(self.workers.values()) + list(self.in_flight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+        self.in_flight.clear()
+        self.queues.clear()
+        self.semaphores.clear()
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors.clear()
+
+    def enqueue(self, notifications: List[BrainrotNotification]):
+        """Coloca as notificações na fila de cada destino sem bloquear quem chama"""
+        if not self.queues:
+            return
+        payloads = [notification_to_dict(n) for n in notifications]
+        for url, queue in self.queues.items():
+            dropped = []
+            for payload in payloads:
+                try:
+                    queue.put_nowait(payload)
+                    self.stats[url]["queued"] += 1
+                except asyncio.QueueFull:
+                    dropped.append(payload)
+            if dropped:
+                # Uma entrada por chamada, para não expulsar os lotes que falharam de verdade
+                self.stats[url]["dropped"] += len(dropped)
+                self._dead_letter(url, dropped, "fila cheia")
+
+    def _dead_letter(self, url: str, batch: List[dict], error: str):
+        self.dead_letters.append({
+            "url": url,
+            "error": error,
+            "failed_at": datetime.utcnow().isoformat(),
+            "notifications": batch
+        })
+
+    async def _next_batch(self, queue: asyncio.Queue) -> List[dict]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + WEBHOOK_BATCH_INTERVAL
+        while len(batch) < WEBHOOK_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, url: str):
+        queue = self.queues[url]
+        semaphore = self.semaphores[url]
+        while True:
+            batch = await self._next_batch(queue)
+            # Só monta o próximo lote quando houver vaga, segurando a fila deste destino
+            await semaphore.acquire()
+            task = asyncio.create_task(self._send(url, batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def _send(self, url: str, batch: List[dict]):
+        queue = self.queues[url]
+        try:
+            await self._deliver(url, batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Erro inesperado no webhook {url}: {e}")
+            self.stats[url]["failed"] += len(batch)
+            self.stats[url]["last_error"] = str(e)
+            self._dead_letter(url, batch, str(e))
+        finally:
+            self.semaphores[url].release()
+            for _ in batch:
+                queue.task_done()
+
+    async def _deliver(self, url: str, batch: List[dict]):
+        payload = {
+            "new_messages": batch,
+            "count": len(batch),
+            "sent_at": datetime.utcnow().isoformat()
+        }
+        loop = asyncio.get_running_loop()
+        post = functools.partial(requests.post, url, json=payload, timeout=WEBHOOK_TIMEOUT)
+        error = None
+        for attempt in range(WEBHOOK_MAX_RETRIES + 1):
+            if attempt:
+                self.stats[url]["retries"] += 1
+                delay = WEBHOOK_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay))
+            try:
+                response = await loop.run_in_executor(self.executors[url], post)
+                if response.status_code < 400:
+                    self.stats[url]["delivered"] += len(batch)
+                    print(f"📤 Webhook {url}: {len(batch)} notificações entregues")
+                    return
+                error = f"Status {response.status_code}"
+                # Erros 4xx (exceto 408/429) não vão melhorar com retentativas
+                if response.status_code < 500 and response.status_code not in (408, 429):
+                    break
+            except (requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema, requests.exceptions.InvalidURL) as e:
+                # URL mal configurada também não vai melhorar com retentativas
+                error = str(e)
+                break
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+            print(f"⚠️ Webhook {url}: tentativa {attempt + 1} falhou - {error}")
+
+        self.stats[url]["failed"] += len(batch)
+        self.stats[url]["last_error"] = error
+        self._dead_letter(url, batch, error)
+        print(f"❌ Webhook {url}: {len(batch)} notificações enviadas para dead-letter - {error}")
+
+    def status(self) -> dict:
+        return {
+            "targets": [
+                {
+                    "url": url,
+                    "pending": self.queues[url].qsize() if url in self.queues else 0,
+                    **self.stats[url]
+                }
+                for url in self.urls
+            ],
+            "dead_letters": len(self.dead_letters),
+            "config": {
+                "batch_size": WEBHOOK_BATCH_SIZE,
+                "batch_interval": WEBHOOK_BATCH_INTERVAL,
+                "max_concurrency": WEBHOOK_MAX_CONCURRENCY,
+                "max_retries": WEBHOOK_MAX_RETRIES,
+                "queue_size": WEBHOOK_QUEUE_SIZE,
+                "dead_letter_size": WEBHOOK_DEAD_LETTER_SIZE,
+                "seen_size": WEBHOOK_SEEN_SIZE,
+                "poll_interval": WEBHOOK_POLL_INTERVAL
+            }
+        }
+
+webhook_dispatcher = WebhookDispatcher(WEBHOOK_URLS)
+
+# Controle próprio do poller dos webhooks, separado do cache do endpoint de pull,
+# para que /api/messages/new e /api/debug/clear-cache não afetem o que é enviado.
+# Um canal só entra em webhook_seen_messages depois da primeira busca bem-sucedida.
+webhook_last_message_ids: Dict[str, str] = {}
+webhook_seen_messages: Dict[str, deque] = {}
+webhook_poller_task = None
+
+async def poll_webhook_channels_once():
+    """Faz uma passada por todos os canais e envia as mensagens novas para os webhooks"""
+    for channel_id in DISCORD_CHANNELS:
+        try:
+            messages = await asyncio.to_thread(
+                fetch_discord_messages, channel_id, webhook_last_message_ids.get(channel_id)
+            )
+            if messages is None:
+                continue
+            
+            if messages:
+                webhook_last_message_ids[channel_id] = messages[0]['id']
+            
+            # Na primeira busca do canal só marcamos o histórico, para não reenviar a cada deploy
+            if channel_id not in webhook_seen_messages:
+                webhook_seen_messages[channel_id] = deque(
+                    (msg['id'] for msg in reversed(messages)), maxlen=WEBHOOK_SEEN_SIZE
+                )
+                continue
+            
+            seen = webhook_seen_messages[channel_id]
+            notifications = []
+            for message in reversed(messages):
+                if message['id'] in seen:
+                    continue
+                seen.append(message['id'])
+                notification = parse_brainrot_embed(message, channel_id)
+                if notification:
+                    notifications.append(notification)
+            
+            if notifications:
+                print(f"📤 Canal {channel_id}: {len(notifications)} notificações para os webhooks")
+                webhook_dispatcher.enqueue(notifications)
+        except Exception as e:
+            print(f"❌ Erro no poller de webhooks (canal {channel_id}): {e}")
+
+async def poll_channels_for_webhooks():
+    """Busca mensagens novas dos canais periodicamente e envia para os webhooks"""
+    while True:
+        await poll_webhook_channels_once()
+        await asyncio.sleep(WEBHOOK_POLL_INTERVAL)
+
+def require_admin(request: Request):
+    """Valida o token de admin enviado no header X-Admin-Token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de admin desativados - defina ADMIN_TOKEN")
+    token = request.headers.get("X-Admin-Token", "")
+    # Comparar bytes: compare_digest rejeita str com caracteres fora do ASCII
+    if not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Token de admin inválido")
+
+def format_stack(frame) -> List[str]:
+    """Converte um frame em uma lista de 'arquivo:função:linha' da raiz até a folha"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+class SamplingProfiler:
+    """Profiler por amostragem que lê os frames das threads do próprio processo.
+
+    Uma thread separada captura a pilha das threads alvo a cada intervalo,
+    sem instrumentar o código, então pode rodar com o serviço em produção.
+    Com `code_filter`, só entram as pilhas que passam por um desses code objects.
+    """
+
+    def __init__(self, thread_ids: Optional[List[int]] = None, interval: float = PROFILE_SAMPLE_INTERVAL,
+                 code_filter: Optional[set] = None):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.code_filter = code_filter
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    def _run(self):
+        # Primeira amostra imediata, sem esperar o intervalo
+        while True:
+            self._sample()
+            if self._stop.wait(self.interval):
+                break
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if self.thread_ids is not None and thread_id not in self.thread_ids:
+                continue
+            if self.code_filter is not None and not self._matches(frame):
+                continue
+            self.stacks[";".join(format_stack(frame))] += 1
+            self.samples += 1
+
+    def _matches(self, frame) -> bool:
+        while frame is not None:
+            if frame.f_code in self.code_filter:
+                return True
+            frame = frame.f_back
+        return False
+
+    def collapsed(self) -> str:
+        """Saída no formato 'collapsed stack' (flamegraph.pl / speedscope)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[dict]:
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return [
+            {
+                "function": name,
+                "self_samples": own[name],
+                "total_samples": total[name],
+                "self_pct": round(100 * own[name] / self.samples, 2) if self.samples else 0,
+                "total_pct": round(100 * total[name] / self.samples, 2) if self.samples else 0
+            }
+            for name in sorted(total, key=lambda name: (own[name], total[name]), reverse=True)[:limit]
+        ]
+
+    def report(self, limit: int = 20) -> dict:
+        return {
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "top_functions": self.top_functions(limit),
+            "collapsed": self.collapsed()
+        }
+
+class LoopLagMonitor:
+    """Mede o atraso do event loop e registra quem o bloqueou.
+
+    Uma task no loop atualiza um heartbeat periodicamente; uma thread watchdog
+    percebe quando o heartbeat para de avançar além do limite e captura a pilha
+    da thread do loop naquele momento, junto com as requisições em andamento.
+    """
+
+    def __init__(self):
+        self.events = deque(maxlen=LOOP_LAG_EVENTS_SIZE)
+        self.active_requests: Dict[int, dict] = {}
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task:
+            return
+        self._stop.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        print(f"⏱️ Monitor de lag do event loop ativo (limite {LOOP_LAG_THRESHOLD * 1000:.0f}ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            # O watchdog acorda em até LOOP_LAG_INTERVAL; esperar evita dois watchdogs após um start()
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _tick(self):
+        while True:
+            expected = time.monotonic() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.last_lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    def _watch(self):
+        # Captura a pilha uma vez por bloqueio, enquanto o loop ainda está travado
+        captured_for = None
+        while not self._stop.wait(LOOP_LAG_INTERVAL):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - LOOP_LAG_INTERVAL
+            if blocked_for < LOOP_LAG_THRESHOLD:
+                continue
+            try:
+                if captured_for == heartbeat:
+                    self.events[-1]["blocked_for"] = round(blocked_for, 3)
+                    continue
+                captured_for = heartbeat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                # Snapshot: o loop pode alterar o dict enquanto esta thread lê
+                handlers = [request["path"] for request in list(self.active_requests.values())]
+                self.events.append({
+                    "detected_at": datetime.utcnow().isoformat(),
+                    "blocked_for": round(blocked_for, 3),
+                    "handlers": handlers,
+                    "stack": format_stack(frame) if frame is not None else []
+                })
+                print(f"🐢 Event loop bloqueado por {blocked_for * 1000:.0f}ms - handlers: {handlers or 'nenhum'}")
+            except Exception as e:
+                print(f"❌ Erro no monitor de lag do event loop: {e}")
+
+    def status(self) -> dict:
+        return {
+            "threshold": LOOP_LAG_THRESHOLD,
+            "interval": LOOP_LAG_INTERVAL,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            "active_requests": list(self.active_requests.values()),
+            "events": list(self.events)
+        }
+
+loop_lag_monitor = LoopLagMonitor()
+last_request_profile = {}
+
+def find_endpoint(request: Request):
+    """Retorna a função do endpoint que vai atender a requisição, se houver"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "endpoint", None)
+    return None
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Registra requisições em andamento e faz profiling de uma requisição com X-Profile: 1.
+
+    Só são contadas as amostras cuja pilha passa pelo endpoint da requisição, o que
+    exclui os workers de webhook, o monitor de lag e outros endpoints. Limitações:
+    requisições simultâneas ao mesmo endpoint também entram no profile, o tempo
+    gasto em middlewares/serialização fica de fora, e requisições mais curtas que
+    PROFILE_SAMPLE_INTERVAL podem voltar sem nenhuma amostra.
+    """
+    request_key = id(request)
+    loop_lag_monitor.active_requests[request_key] = {
+        "path": request.url.path,
+        "started_at": datetime.utcnow().isoformat()
+    }
+    profiler = None
+    try:
+        # Sem ADMIN_TOKEN o header é ignorado e a requisição segue normalmente
+        if ADMIN_TOKEN and request.headers.get("X-Profile") == "1":
+            require_admin(request)
+            endpoint = find_endpoint(request)
+            if endpoint is not None and hasattr(endpoint, "__code__"):
+                profiler = SamplingProfiler(code_filter={endpoint.__code__})
+                profiler.start()
+        response = await call_next(request)
+    except HTTPException as e:
+        return JSONResponse({"detail": e.detail}, status_code=e.status_code)
+    finally:
+        loop_lag_monitor.active_requests.pop(request_key, None)
+        if profiler:
+            profiler.stop()
+            last_request_profile.clear()
+            last_request_profile.update({
+                "path": request.url.path,
+                "query": str(request.url.query),
+                "profiled_at": datetime.utcnow().isoformat(),
+                **profiler.report()
+            })
+    if profiler:
+        response.headers["X-Profile-Result"] = "/api/admin/profile/last"
+    return response
+
 # Endpoints da API (mantenha os mesmos endpoints)
 @app.get("/api/debug/messages")
 async def debug_messages(channel_id: str):
@@ -474,19 +988,7 @@ async def get_new_messages(last_message_ids: Optional[str] = None):
         
         return {
             "success": True,
-            "new_messages": [
-                {
-                    "message_id": msg.message_id,
-                    "brainrot_name": msg.brainrot_name,
-                    "generation_rate": msg.generation_rate,
-                    "job_id": msg.job_id,
-                    "channel_id": msg.channel_id,
-                    "timestamp": msg.timestamp,
-                    "players": msg.players,
-                    "base_name": msg.base_name
-                }
-                for msg in all_notifications
-            ],
+            "new_messages": [notification_to_dict(msg) for msg in all_notifications],
             "message": response_message
         }
         
@@ -584,6 +1086,72 @@ async def clear_cache():
         "cleared_channels": DISCORD_CHANNELS
     }
 
+@app.get("/api/webhooks")
+async def webhooks_status(request: Request):
+    """Endpoint de admin para ver o estado da fila de webhooks de saída"""
+    require_admin(request)
+    return {
+        "success": True,
+        "enabled": bool(WEBHOOK_URLS),
+        **webhook_dispatcher.status()
+    }
+
+@app.get("/api/webhooks/dead-letter")
+async def webhooks_dead_letter(request: Request):
+    """Endpoint de admin para ver os lotes que não puderam ser entregues"""
+    require_admin(request)
+    return {
+        "success": True,
+        "dead_letters": list(webhook_dispatcher.dead_letters)
+    }
+
+@app.get("/api/admin/profile")
+async def profile_process(request: Request, seconds: float = 5, all_threads: bool = False,
+                          output: str = Query("json", alias="format"), limit: int = 20):
+    """Endpoint de admin que faz profiling por amostragem do processo por N segundos"""
+    require_admin(request)
+    seconds = max(0.1, min(seconds, PROFILE_MAX_SECONDS))
+    
+    print(f"🔬 Profiling do processo por {seconds}s (todas as threads: {all_threads})")
+    profiler = SamplingProfiler(thread_ids=None if all_threads else [threading.get_ident()])
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    
+    if output == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    
+    return {
+        "success": True,
+        **profiler.report(limit)
+    }
+
+@app.get("/api/admin/profile/last")
+async def profile_last_request(request: Request, output: str = Query("json", alias="format")):
+    """Endpoint de admin com o profile da última requisição enviada com X-Profile: 1"""
+    require_admin(request)
+    if not last_request_profile:
+        return {"success": False, "message": "Nenhuma requisição com profiling ainda"}
+    
+    if output == "collapsed":
+        return PlainTextResponse(last_request_profile["collapsed"])
+    
+    return {
+        "success": True,
+        **last_request_profile
+    }
+
+@app.get("/api/admin/loop-lag")
+async def loop_lag(request: Request):
+    """Endpoint de admin com o lag do event loop e os bloqueios detectados"""
+    require_admin(request)
+    return {
+        "success": True,
+        **loop_lag_monitor.status()
+    }
+
 @app.get("/api/server")
 async def server_info():
     """Endpoint para mostrar informações do servidor"""
@@ -629,7 +1197,12 @@ async def root():
             "/api/test": "Dados de teste",
             "/api/health": "Status da API",
             "/api/server": "Informações do servidor",
-            "/api/debug/clear-cache": "Limpar cache"
+            "/api/debug/clear-cache": "Limpar cache",
+            "/api/webhooks": "Status dos webhooks de saída (admin)",
+            "/api/webhooks/dead-letter": "Webhooks que falharam (admin)",
+            "/api/admin/profile": "Profiling do processo (admin)",
+            "/api/admin/profile/last": "Profile da última requisição com X-Profile (admin)",
+            "/api/admin/loop-lag": "Lag do event loop (admin)"
         },
         "deployment_instructions": {
             "render": "https://render.com/docs/deploy-fastapi",
@@ -666,6 +1239,26 @@ async def startup_event():
     
     # Testar permissões do bot
     test_bot_permissions()
+    
+    # Iniciar workers dos webhooks de saída e o poller que os alimenta
+    global webhook_poller_task
+    webhook_dispatcher.start()
+    if WEBHOOK_URLS and webhook_poller_task is None:
+        webhook_poller_task = asyncio.create_task(poll_channels_for_webhooks())
+        print(f"🔄 Poller de webhooks ativo (a cada {WEBHOOK_POLL_INTERVAL}s)")
+    
+    # Monitorar bloqueios do event loop
+    loop_lag_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    global webhook_poller_task
+    if webhook_poller_task:
+        webhook_poller_task.cancel()
+        await asyncio.gather(webhook_poller_task, return_exceptions=True)
+        webhook_poller_task = None
+    await webhook_dispatcher.stop()
+    await loop_lag_monitor.stop()
 
 # Para rodar localmente (se necessário)
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import joiner
+
+TOKEN = "s3cret"
+ADMIN = {"X-Admin-Token": TOKEN}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(joiner, "ADMIN_TOKEN", TOKEN)
+    # Sem "with": não roda o startup, que testa o bot no Discord
+    return TestClient(joiner.app)
+
+
+def busy(seconds):
+    started = time.monotonic()
+    while time.monotonic() - started < seconds:
+        sum(range(1000))
+
+
+@pytest.mark.parametrize("path", ["/api/admin/profile", "/api/admin/profile/last", "/api/admin/loop-lag", "/api/webhooks"])
+def test_admin_disabled_without_token(client, monkeypatch, path):
+    monkeypatch.setattr(joiner, "ADMIN_TOKEN", None)
+
+    response = client.get(path, headers=ADMIN)
+
+    assert response.status_code == 403
+
+
+def test_profile_header_ignored_without_admin_token(client, monkeypatch):
+    monkeypatch.setattr(joiner, "ADMIN_TOKEN", None)
+
+    response = client.get("/api/health", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "x-profile-result" not in response.headers
+
+
+@pytest.mark.parametrize("token", [b"wrong", b"caf\xe9"])
+def test_bad_token_is_rejected(client, token):
+    endpoint = client.get("/api/admin/loop-lag", headers={"X-Admin-Token": token})
+    middleware = client.get("/api/health", headers={"X-Admin-Token": token, "X-Profile": "1"})
+
+    for response in (endpoint, middleware):
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Token de admin inválido"}
+
+
+def test_request_profile_only_counts_the_handler(client, monkeypatch):
+    def slow_fetch(channel_id, last_message_id=None):
+        busy(0.05)
+        return []
+
+    monkeypatch.setattr(joiner, "fetch_discord_messages", slow_fetch)
+
+    response = client.get("/api/messages/new", headers={"X-Profile": "1", **ADMIN})
+    assert response.headers["x-profile-result"] == "/api/admin/profile/last"
+
+    profile = client.get("/api/admin/profile/last", headers=ADMIN).json()
+    assert profile["path"] == "/api/messages/new"
+    assert profile["samples"] > 0
+    lines = profile["collapsed"].splitlines()
+    assert lines and all("get_new_messages" in line for line in lines)
+
+
+def test_process_profile_collapsed_output(client):
+    response = client.get("/api/admin/profile", params={"seconds": 0.1, "all_threads": True, "format": "collapsed"}, headers=ADMIN)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+
+def test_sampling_profiler_top_functions():
+    profiler = joiner.SamplingProfiler(thread_ids=[threading.get_ident()], interval=0.001)
+    profiler.start()
+    busy(0.1)
+    profiler.stop()
+
+    report = profiler.report(limit=5)
+    assert report["samples"] > 0
+    assert report["top_functions"][0]["function"].split(":")[1] == "busy"
+
+
+def test_loop_lag_monitor_records_blocking_handler(monkeypatch):
+    monkeypatch.setattr(joiner, "LOOP_LAG_INTERVAL", 0.02)
+    monkeypatch.setattr(joiner, "LOOP_LAG_THRESHOLD", 0.1)
+
+    async def main():
+        monitor = joiner.LoopLagMonitor()
+        monitor.start()
+        await asyncio.sleep(0.05)
+        monitor.active_requests[1] = {"path": "/blocking", "started_at": "now"}
+        busy(0.4)
+        monitor.active_requests.pop(1)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(main())
+
+    assert len(monitor.events) == 1
+    event = monitor.events[0]
+    assert event["handlers"] == ["/blocking"]
+    assert any(":busy:" in frame for frame in event["stack"])
+    assert monitor.max_lag >= 0.1
+
+
+def test_loop_lag_monitor_restart_keeps_one_watchdog(monkeypatch):
+    monkeypatch.setattr(joiner, "LOOP_LAG_INTERVAL", 0.05)
+
+    async def main():
+        monitor = joiner.LoopLagMonitor()
+        monitor.start()
+        await monitor.stop()
+        monitor.start()
+        watchdogs = [t for t in threading.enumerate() if t.name == "loop-lag-watchdog"]
+        await monitor.stop()
+        return watchdogs
+
+    assert len(asyncio.run(main())) == 1
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import joiner
+
+
+class Sink:
+    """Servidor HTTP local que registra os lotes recebidos por caminho"""
+
+    def __init__(self):
+        self.batches = defaultdict(list)
+        self.failures_left = {}
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.startswith("/slow"):
+                    time.sleep(1)
+                    status = 200
+                elif self.path == "/bad":
+                    status = 400
+                elif self.path == "/down":
+                    status = 503
+                elif sink.failures_left.get(self.path, 0) > 0:
+                    sink.failures_left[self.path] -= 1
+                    status = 503
+                else:
+                    sink.batches[self.path].append(body["count"])
+                    status = 200
+                self.send_response(status)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return self.base + path
+
+
+@pytest.fixture
+def sink():
+    server = Sink()
+    yield server
+    server.server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fast_webhooks(monkeypatch):
+    monkeypatch.setattr(joiner, "WEBHOOK_BATCH_SIZE", 10)
+    monkeypatch.setattr(joiner, "WEBHOOK_BATCH_INTERVAL", 0.2)
+    monkeypatch.setattr(joiner, "WEBHOOK_MAX_RETRIES", 3)
+    monkeypatch.setattr(joiner, "WEBHOOK_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(joiner, "WEBHOOK_TIMEOUT", 5)
+
+
+def make_notifications(count):
+    return [
+        joiner.BrainrotNotification(
+            message_id=str(i),
+            brainrot_name="Los Tipi Tacos",
+            generation_rate="2M",
+            job_id="5ab7c5e4-35a1-4552-8264-4cbdd6aab1f6",
+            channel_id=joiner.DISCORD_CHANNELS[0],
+            timestamp="2024-01-01T00:00:00",
+        )
+        for i in range(count)
+    ]
+
+
+def run_dispatcher(urls, notifications, setup=None):
+    async def main():
+        dispatcher = joiner.WebhookDispatcher(urls)
+        if setup:
+            setup(dispatcher)
+        dispatcher.start()
+        for chunk in notifications:
+            dispatcher.enqueue(chunk)
+        await asyncio.wait_for(asyncio.gather(*(q.join() for q in dispatcher.queues.values())), 10)
+        await dispatcher.stop()
+        return dispatcher
+
+    return asyncio.run(main())
+
+
+def test_batches_by_size(sink):
+    dispatcher = run_dispatcher([sink.url("/ok")], [make_notifications(25)])
+
+    assert sorted(sink.batches["/ok"]) == [5, 10, 10]
+    stats = dispatcher.stats[sink.url("/ok")]
+    assert stats["delivered"] == 25
+    assert stats["retries"] == 0
+    assert not dispatcher.dead_letters
+
+
+def test_retries_then_delivers(sink):
+    sink.failures_left["/flaky"] = 2
+    dispatcher = run_dispatcher([sink.url("/flaky")], [make_notifications(5)])
+
+    assert sink.batches["/flaky"] == [5]
+    stats = dispatcher.stats[sink.url("/flaky")]
+    assert stats["retries"] == 2
+    assert stats["delivered"] == 5
+    assert not dispatcher.dead_letters
+
+
+def test_dead_letters_after_retries(sink):
+    dispatcher = run_dispatcher([sink.url("/down")], [make_notifications(5)])
+
+    stats = dispatcher.stats[sink.url("/down")]
+    assert stats["retries"] == joiner.WEBHOOK_MAX_RETRIES
+    assert stats["failed"] == 5
+    assert len(dispatcher.dead_letters) == 1
+    assert dispatcher.dead_letters[0]["error"] == "Status 503"
+
+
+def test_permanent_errors_are_not_retried(sink):
+    dispatcher = run_dispatcher([sink.url("/bad"), "notaurl"], [make_notifications(3)])
+
+    for url in (sink.url("/bad"), "notaurl"):
+        assert dispatcher.stats[url]["retries"] == 0
+        assert dispatcher.stats[url]["failed"] == 3
+    assert len(dispatcher.dead_letters) == 2
+
+
+def test_slow_target_does_not_delay_others(sink, monkeypatch):
+    monkeypatch.setattr(joiner, "WEBHOOK_BATCH_SIZE", 1)
+    urls = [sink.url("/slow-a"), sink.url("/slow-b"), sink.url("/ok")]
+
+    async def main():
+        # Executor padrão pequeno: os POSTs não podem depender dele
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        dispatcher = joiner.WebhookDispatcher(urls)
+        dispatcher.start()
+        dispatcher.enqueue(make_notifications(9))
+        started = time.monotonic()
+        await asyncio.wait_for(dispatcher.queues[sink.url("/ok")].join(), 10)
+        elapsed = time.monotonic() - started
+        await dispatcher.stop()
+        return dispatcher, elapsed
+
+    dispatcher, elapsed = asyncio.run(main())
+
+    assert elapsed < 0.8
+    assert sink.batches["/ok"] == [1] * 9
+    assert dispatcher.stats[sink.url("/ok")]["delivered"] == 9
+
+
+def test_full_queue_is_one_dead_letter_per_enqueue(sink, monkeypatch):
+    monkeypatch.setattr(joiner, "WEBHOOK_QUEUE_SIZE", 2)
+    dispatcher = run_dispatcher([sink.url("/ok")], [make_notifications(5)])
+
+    stats = dispatcher.stats[sink.url("/ok")]
+    assert stats["dropped"] == 3
+    assert len(dispatcher.dead_letters) == 1
+    assert len(dispatcher.dead_letters[0]["notifications"]) == 3
+
+
+def test_worker_survives_unexpected_errors(sink):
+    calls = []
+
+    def setup(dispatcher):
+        original = dispatcher._deliver
+
+        async def flaky_deliver(url, batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise ValueError("boom")
+            await original(url, batch)
+
+        dispatcher._deliver = flaky_deliver
+
+    async def main():
+        dispatcher = joiner.WebhookDispatcher([sink.url("/ok")])
+        setup(dispatcher)
+        dispatcher.start()
+        queue = dispatcher.queues[sink.url("/ok")]
+        dispatcher.enqueue(make_notifications(3))
+        await asyncio.wait_for(queue.join(), 10)
+        dispatcher.enqueue(make_notifications(2))
+        await asyncio.wait_for(queue.join(), 10)
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(main())
+
+    assert sink.batches["/ok"] == [2]
+    assert dispatcher.dead_letters[0]["error"] == "boom"
+    assert dispatcher.stats[sink.url("/ok")]["failed"] == 3
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.enqueued = []
+
+    def enqueue(self, notifications):
+        self.enqueued.append([n.message_id for n in notifications])
+
+
+@pytest.fixture
+def poller(monkeypatch):
+    """Canal falso (mais recente primeiro) ligado ao poller dos webhooks"""
+    channel_id = joiner.DISCORD_CHANNELS[0]
+    state = {"messages": [], "fail": False}
+
+    def fake_fetch(channel, last_message_id=None):
+        if channel != channel_id:
+            return []
+        if state["fail"]:
+            return None
+        new_messages = []
+        for msg in state["messages"]:
+            if msg["id"] == last_message_id:
+                break
+            new_messages.append(msg)
+        return new_messages
+
+    def fake_parse(message, channel):
+        notification = make_notifications(1)[0]
+        notification.message_id = message["id"]
+        return notification
+
+    dispatcher = FakeDispatcher()
+    monkeypatch.setattr(joiner, "fetch_discord_messages", fake_fetch)
+    monkeypatch.setattr(joiner, "parse_brainrot_embed", fake_parse)
+    monkeypatch.setattr(joiner, "webhook_dispatcher", dispatcher)
+    monkeypatch.setattr(joiner, "webhook_last_message_ids", {})
+    monkeypatch.setattr(joiner, "webhook_seen_messages", {})
+
+    def set_messages(*ids):
+        state["messages"] = [{"id": message_id} for message_id in ids]
+
+    def poll():
+        asyncio.run(joiner.poll_webhook_channels_once())
+        return dispatcher.enqueued.pop() if dispatcher.enqueued else []
+
+    return set_messages, poll, state
+
+
+def test_poller_skips_history_then_sends_new_oldest_first(poller):
+    set_messages, poll, _ = poller
+
+    set_messages("2", "1")
+    assert poll() == []
+
+    set_messages("5", "4", "3", "2", "1")
+    assert poll() == ["3", "4", "5"]
+    assert poll() == []
+
+
+def test_poller_failed_first_fetch_does_not_send_history(poller):
+    set_messages, poll, state = poller
+
+    set_messages("2", "1")
+    state["fail"] = True
+    assert poll() == []
+
+    state["fail"] = False
+    assert poll() == []
+
+    set_messages("3", "2", "1")
+    assert poll() == ["3"]
+
+
+def test_poller_dedups_when_last_message_is_gone(poller):
+    set_messages, poll, _ = poller
+
+    set_messages("2", "1")
+    poll()
+    set_messages("3", "2", "1")
+    assert poll() == ["3"]
+
+    # A última mensagem foi apagada: a busca devolve tudo de novo
+    set_messages("4", "2", "1")
+    assert poll() == ["4"]
+
+
+def test_poller_seen_ids_are_bounded(poller, monkeypatch):
+    monkeypatch.setattr(joiner, "WEBHOOK_SEEN_SIZE", 3)
+    set_messages, poll, _ = poller
+
+    set_messages("2", "1")
+    poll()
+    set_messages("6", "5", "4", "3", "2", "1")
+    assert poll() == ["3", "4", "5", "6"]
+    assert list(joiner.webhook_seen_messages[joiner.DISCORD_CHANNELS[0]]) == ["4", "5", "6"]